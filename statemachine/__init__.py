@@ -20,6 +20,7 @@ from statemachine.types import (
 from statemachine.helpers import (
     build_metadata_dict,
     create_state_metadata,
+    jit_kernel,
     log_state_execution,
 )
 
@@ -32,5 +33,6 @@ __all__ = [
     "StateExecutionContext",
     "build_metadata_dict",
     "create_state_metadata",
+    "jit_kernel",
     "log_state_execution",
 ]
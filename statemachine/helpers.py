@@ -7,13 +7,25 @@ when defining states, metadata, and transitions.
 
 import logging
 from enum import Enum
-from functools import wraps
-from typing import Dict, Optional
+from functools import lru_cache, wraps
+from typing import Dict, Optional, Tuple
 
 from statemachine.types import StateExecutionContext, StateMetadata, StateResult
 
 logger = logging.getLogger(__name__)
 
+# Enum members are singletons, so their upper-cased names can be cached
+# for the lifetime of the process. Keyed on (enum class, member) because
+# members of str/int-mixin enums hash and compare equal to their values.
+_UPPER_NAMES: Dict[Tuple[type, Enum], str] = {}
+
+# Exit message logged by log_state_execution for each handler result
+_RESULT_MESSAGES: Dict[StateResult, str] = {
+    StateResult.SUCCESS: "Complete",
+    StateResult.FAILURE: "Failed",
+    StateResult.RETRY: "Retrying...",
+}
+
 
 def create_state_metadata(
     name: str,
@@ -87,12 +99,12 @@ def build_metadata_dict(
     for state, config in configs.items():
         if "name" not in config:
             raise ValueError(f"State {state} config missing required 'name' field")
-        result[state] = create_state_metadata(
+        result[state] = StateMetadata(
             name=config["name"],
             description=config.get("description", ""),
             max_retries=config.get("max_retries", 3),
-            timeout=config.get("timeout", None),
-            failover_state=config.get("failover", None),
+            timeout=config.get("timeout"),
+            failover_state=config.get("failover"),
         )
     return result
 
@@ -117,15 +129,69 @@ def log_state_execution(func):
 
     @wraps(func)
     def wrapper(self, context: StateExecutionContext) -> StateResult:
-        state_name = context.current_state.name.upper()
-        logger.debug(f"{state_name}: Starting...")
+        state = context.current_state
+        key = (type(state), state)
+        state_name = _UPPER_NAMES.get(key)
+        if state_name is None:
+            state_name = _UPPER_NAMES[key] = state.name.upper()
+        logger.debug("%s: Starting...", state_name)
         result = func(self, context)
-        if result == StateResult.SUCCESS:
-            logger.debug(f"{state_name}: Complete")
-        elif result == StateResult.FAILURE:
-            logger.debug(f"{state_name}: Failed")
-        elif result == StateResult.RETRY:
-            logger.debug(f"{state_name}: Retrying...")
+        message = _RESULT_MESSAGES.get(result)
+        if message is not None:
+            logger.debug("%s: %s", state_name, message)
         return result
 
     return wrapper
+
+
+@lru_cache(maxsize=None)
+def _load_njit():
+    """Import ``numba.njit`` on first use; None if numba is not installed."""
+    try:
+        from numba import njit
+    except ImportError:  # numba is an optional dependency
+        return None
+    return njit
+
+
+def jit_kernel(func=None, **options):
+    """
+    Decorator that JIT-compiles a numeric function with numba, if installed.
+
+    Intended for arithmetic-heavy helpers called from state handlers. The
+    handlers themselves cannot be compiled — numba's nopython mode does not
+    accept ``self`` or a StateExecutionContext — so keep the numeric work in
+    a plain function and decorate that instead. Without numba the function
+    is returned unchanged.
+
+    Usage:
+        @jit_kernel
+        def checksum(n):
+            total = 0
+            for i in range(n):
+                total += i * i
+            return total
+
+        def _handle_process(self, context: StateExecutionContext) -> StateResult:
+            self.total = checksum(10_000)
+            return StateResult.SUCCESS
+
+    Args:
+        func: The function to compile (when used without parentheses).
+        **options: Passed to ``numba.njit``. ``cache`` defaults to True so
+                   compiled code is reused across processes.
+
+    Note:
+        Importing numba adds noticeable start-up time, and the first call
+        to each kernel pays the compilation cost. Only worth it for
+        functions that run often or do substantial numeric work.
+    """
+    options.setdefault("cache", True)
+
+    def decorate(f):
+        njit = _load_njit()
+        if njit is None:
+            return f
+        return njit(**options)(f)
+
+    return decorate(func) if func is not None else decorate
@@ -40,12 +40,15 @@ Usage:
         def _handle_save(self, ctx): ...
 """
 
+import inspect
+import itertools
 import logging
 import time
 from abc import ABC, abstractmethod
 from collections import deque
 from enum import Enum
-from typing import Callable, Dict, List, Optional
+from types import FunctionType
+from typing import Callable, Dict, List, Optional, Tuple
 
 from statemachine.types import (
     StateExecutionContext,
@@ -57,6 +60,16 @@ from statemachine.types import (
 
 logger = logging.getLogger(__name__)
 
+# An unbound handler function, called as handler(machine, context)
+StateHandler = Callable[["StateMachine", StateExecutionContext], StateResult]
+
+# Enum members are singletons: bind them once and compare by identity
+_SUCCESS = StateResult.SUCCESS
+_FAILURE = StateResult.FAILURE
+_RETRY = StateResult.RETRY
+_TIMEOUT = StateResult.TIMEOUT
+_FAILED_RESULTS = (_FAILURE, _RETRY, _TIMEOUT)
+
 
 class StateMachine(ABC):
     """
@@ -65,23 +78,66 @@ class StateMachine(ABC):
     Subclass this and implement the four abstract methods plus one
     ``_handle_<state_value>`` method per state.
 
+    The engine's own state lives in ``__slots__``. Subclasses that add
+    instance attributes keep working as usual (they get a ``__dict__``);
+    subclasses that want the full memory saving can declare their own
+    ``__slots__`` listing any extra attributes. Instances stay weakly
+    referenceable either way.
+
     Attributes:
         MAX_STATES_PER_RUN: Safety cap on state transitions per ``run()``
                             call to prevent infinite loops (default: 100).
+        MAX_HISTORY: Number of StateHistoryEntry records retained; older
+                     entries are dropped. Set on a subclass; 0 keeps no
+                     history (default: 100).
+        RETRY_BACKOFF_BASE: Initial delay in seconds before re-invoking a
+                            handler that returned RETRY (default: 0.01).
+        RETRY_BACKOFF_CAP: Upper bound in seconds on the RETRY delay, which
+                           doubles after every consecutive RETRY (default: 1.0).
     """
 
+    __slots__ = (
+        "_states",
+        "_state_metadata",
+        "_transitions",
+        "_current_state",
+        "_transition_map",
+        "_next_state_table",
+        "_handler_map",
+        "_state_history",
+        "_retry_counts",
+        "_context",
+        "_initialized",
+        "_watchdog_timeout",
+        "_watchdog_last_activity",
+        "_watchdog_warned",
+        "__weakref__",
+    )
+
     MAX_STATES_PER_RUN: int = 100
+    MAX_HISTORY: int = 100
+    RETRY_BACKOFF_BASE: float = 0.01
+    RETRY_BACKOFF_CAP: float = 1.0
 
     def __init__(self):
         self._states: Optional[type[Enum]] = None
         self._state_metadata: Dict[Enum, StateMetadata] = {}
         self._transitions: List[StateTransition] = []
         self._current_state: Optional[Enum] = None
-        self._transition_map: Dict[Enum, List[StateTransition]] = {}
-
-        self._state_history: deque = deque(maxlen=100)
+        # from_state → (conditional transitions to try in order, unconditional fallback)
+        self._transition_map: Dict[
+            Enum, Tuple[Tuple[StateTransition, ...], Optional[Enum]]
+        ] = {}
+        # Set only when no transition has a condition: from_state → to_state
+        self._next_state_table: Optional[Dict[Enum, Enum]] = None
+        self._handler_map: Dict[Enum, StateHandler] = {}
+
+        self._state_history: deque = deque(maxlen=self.MAX_HISTORY)
         self._retry_counts: Dict[Enum, int] = {}
 
+        # Reused for every handler call; see _execute_state
+        self._context: StateExecutionContext = StateExecutionContext(current_state=None)
+
         self._initialized: bool = False
 
         # Watchdog (disabled by default)
@@ -119,10 +175,11 @@ class StateMachine(ABC):
 
         Called automatically by ``run()`` if not already done.
         Validates that every state has metadata and all transitions
-        reference valid states.
+        reference valid states, then resolves every state's handler.
 
         Raises:
             ValueError: On invalid configuration.
+            AttributeError: If any state has no ``_handle_<state_value>`` method.
         """
         if self._initialized:
             return
@@ -132,19 +189,47 @@ class StateMachine(ABC):
         self._transitions = self.define_transitions()
         self._current_state = self.get_initial_state()
 
-        # Build O(1) lookup map
-        self._transition_map = {}
+        # Build O(1) lookup map. Per source state, only the conditional
+        # transitions declared before the first unconditional one can ever
+        # be taken; that unconditional target becomes the fallback.
+        grouped: Dict[Enum, List[StateTransition]] = {}
         for t in self._transitions:
-            self._transition_map.setdefault(t.from_state, []).append(t)
+            grouped.setdefault(t.from_state, []).append(t)
+
+        self._transition_map = {}
+        for state, transitions in grouped.items():
+            conditional = []
+            fallback = None
+            for t in transitions:
+                if t.condition is None:
+                    fallback = t.to_state
+                    break
+                conditional.append(t)
+            self._transition_map[state] = (tuple(conditional), fallback)
+
+        # With no conditions anywhere the graph is static: one lookup per step
+        if all(t.condition is None for t in self._transitions):
+            self._next_state_table = {
+                state: fallback for state, (_, fallback) in self._transition_map.items()
+            }
+        else:
+            self._next_state_table = None
 
         self._validate()
+
+        # Resolve handlers once so execution is a single dict lookup. The map
+        # holds plain functions, not bound methods, so it does not create a
+        # self → map → method → self cycle that only the GC could break.
+        self._handler_map = {s: self._get_state_handler(s) for s in self._states}
+
         self._initialized = True
 
         logger.info(
-            f"{self.__class__.__name__} initialised — "
-            f"{len(self._state_metadata)} states, "
-            f"{len(self._transitions)} transitions, "
-            f"starting at {self._current_state.name}"
+            "%s initialised — %d states, %d transitions, starting at %s",
+            self.__class__.__name__,
+            len(self._state_metadata),
+            len(self._transitions),
+            self._current_state.name,
         )
 
     def _validate(self) -> None:
@@ -181,12 +266,25 @@ class StateMachine(ABC):
 
         self._retry_counts.clear()
         steps = 0
+        _info = logger.isEnabledFor(logging.INFO)
+
+        # Handler and metadata for the state executed last; re-resolved only
+        # when the state changes (self-transitions reuse them).
+        cached_state = None
+        handler = metadata = None
 
         while steps < self.MAX_STATES_PER_RUN:
-            self._check_watchdog()
+            # Inline guard: no method call per step when the watchdog is off
+            if self._watchdog_timeout is not None:
+                self._check_watchdog()
 
             prev_state = self._current_state
-            result = self._execute_state(self._current_state)
+            if prev_state is not cached_state:
+                cached_state = prev_state
+                handler = self._handler_map[prev_state]
+                metadata = self._state_metadata[prev_state]
+
+            result = self._execute_state(prev_state, handler, metadata)
 
             # If _execute_state changed _current_state (failover), skip the
             # normal transition lookup and let the loop execute the new state.
@@ -196,120 +294,164 @@ class StateMachine(ABC):
 
             next_state = self._get_next_state(self._current_state, result)
             if next_state is None:
-                logger.info(f"No further transitions from {self._current_state.name} — run complete")
+                if _info:
+                    logger.info(
+                        "No further transitions from %s — run complete",
+                        self._current_state.name,
+                    )
                 break
 
-            logger.info(f"Transition: {self._current_state.name} → {next_state.name}")
+            if _info:
+                logger.info("Transition: %s → %s", self._current_state.name, next_state.name)
             self._current_state = next_state
             steps += 1
 
         if steps >= self.MAX_STATES_PER_RUN:
-            logger.error(f"Safety limit reached ({self.MAX_STATES_PER_RUN} states) — stopping")
+            logger.error("Safety limit reached (%d states) — stopping", self.MAX_STATES_PER_RUN)
 
     # ------------------------------------------------------------------
     # State execution
     # ------------------------------------------------------------------
 
-    def _execute_state(self, state: Enum) -> StateResult:
+    def _execute_state(
+        self,
+        state: Enum,
+        handler: StateHandler,
+        metadata: StateMetadata,
+    ) -> StateResult:
         """
         Execute a single state with retry and timeout handling.
 
         On FAILURE / RETRY / TIMEOUT:
-          - If retries remain, recurse and retry.
+          - If retries remain, run the handler again.
           - If retries exhausted and a failover_state is configured,
             jump directly to it and return FAILURE.
           - Otherwise log the error and return FAILURE.
 
         On SUCCESS, reset the retry counter for this state.
-        """
-        metadata = self._state_metadata[state]
-        retry_count = self._retry_counts.get(state, 0)
-
-        logger.info(
-            f"Executing {state.name} "
-            f"(attempt {retry_count + 1}/{metadata.max_retries + 1})"
-        )
-
-        context = StateExecutionContext(current_state=state, retry_count=retry_count)
-        start = time.time()
-        result = StateResult.FAILURE
-        error_message = None
 
-        # Resolve handler before entering the try block so that a missing
-        # handler raises immediately (programming error, not a runtime failure).
-        handler = self._get_state_handler(state)
+        Retries are driven by a loop rather than recursion, so a large
+        ``max_retries`` cannot exhaust the interpreter stack. ``handler`` and
+        ``metadata`` are resolved by the caller and reused for every attempt.
 
-        try:
-            while not context.has_timed_out(metadata.timeout):
-                result = handler(context)
-                if result != StateResult.RETRY:
-                    break
-                time.sleep(0.1)
-
-            if context.has_timed_out(metadata.timeout):
-                logger.warning(f"{state.name} timed out after {metadata.timeout}s")
-                result = StateResult.TIMEOUT
-                error_message = f"Timeout after {metadata.timeout}s"
-
-        except Exception as e:
-            logger.error(f"Error in {state.name}: {e}", exc_info=True)
-            result = StateResult.FAILURE
-            error_message = str(e)
-
-        duration = time.time() - start
-
-        self._state_history.append(
-            StateHistoryEntry(
-                state=state,
-                result=result,
-                duration=duration,
-                retry_count=retry_count,
-                error_message=error_message,
+        A single StateExecutionContext is reset and passed to every handler
+        call, so handlers must not keep a reference to it after returning.
+        """
+        # Hot-path locals: skip global lookups and unused log formatting
+        _now = time.time
+        _info = logger.isEnabledFor(logging.INFO)
+        context = self._context
+
+        result = _FAILURE
+        for retry_count in range(self._retry_counts.get(state, 0), metadata.max_retries + 1):
+            if _info:
+                logger.info(
+                    "Executing %s (attempt %d/%d)",
+                    state.name, retry_count + 1, metadata.max_retries + 1,
+                )
+
+            start = _now()
+            context.current_state = state
+            context.retry_count = retry_count
+            context.start_time = start
+            context._metadata = None
+            deadline = start + metadata.timeout if metadata.timeout is not None else None
+            result = _FAILURE
+            error_message = None
+
+            backoff = min(self.RETRY_BACKOFF_BASE, self.RETRY_BACKOFF_CAP)
+
+            try:
+                while deadline is None or _now() < deadline:
+                    result = handler(self, context)
+                    if result is not _RETRY:
+                        break
+                    # Capped exponential backoff, never sleeping past the timeout
+                    delay = backoff
+                    if deadline is not None:
+                        delay = min(delay, max(0.0, deadline - _now()))
+                    time.sleep(delay)
+                    backoff = min(backoff * 2, self.RETRY_BACKOFF_CAP)
+
+                if deadline is not None and _now() >= deadline:
+                    logger.warning("%s timed out after %ss", state.name, metadata.timeout)
+                    result = _TIMEOUT
+                    error_message = f"Timeout after {metadata.timeout}s"
+
+            except Exception as e:
+                result = _FAILURE
+                error_message = str(e)
+                logger.exception("Error in %s: %s", state.name, error_message)
+
+            end = _now()
+            duration = end - start
+
+            self._state_history.append(
+                StateHistoryEntry(
+                    state=state,
+                    result=result,
+                    duration=duration,
+                    timestamp=end,
+                    retry_count=retry_count,
+                    error_message=error_message,
+                )
             )
-        )
 
-        logger.info(f"{state.name} → {result.value} ({duration:.2f}s)")
+            if _info:
+                logger.info("%s → %s (%.2fs)", state.name, result.value, duration)
+
+            if result not in _FAILED_RESULTS:
+                break
 
-        # Retry / failover logic
-        if result in (StateResult.FAILURE, StateResult.RETRY, StateResult.TIMEOUT):
             if retry_count < metadata.max_retries:
                 self._retry_counts[state] = retry_count + 1
-                return self._execute_state(state)
+        else:
+            # Retries exhausted — failover logic
+            if metadata.failover_state:
+                logger.warning(
+                    "%s failed after %d attempts — failing over to %s",
+                    state.name, metadata.max_retries + 1, metadata.failover_state.name,
+                )
+                self._current_state = metadata.failover_state
+                self._retry_counts[state] = 0
             else:
-                if metadata.failover_state:
-                    logger.warning(
-                        f"{state.name} failed after {metadata.max_retries + 1} attempts — "
-                        f"failing over to {metadata.failover_state.name}"
-                    )
-                    self._current_state = metadata.failover_state
-                    self._retry_counts[state] = 0
-                else:
-                    logger.error(f"{state.name} failed with no failover defined")
+                logger.error("%s failed with no failover defined", state.name)
 
-        if result == StateResult.SUCCESS:
+        if result is _SUCCESS:
             self._retry_counts[state] = 0
 
         return result
 
-    def _get_state_handler(
-        self, state: Enum
-    ) -> Callable[[StateExecutionContext], StateResult]:
+    def _get_state_handler(self, state: Enum) -> StateHandler:
         """
         Resolve the handler method for a state by convention.
 
-        Looks for a method named ``_handle_<state.value.lower()>`` on self.
+        Looks for a method named ``_handle_<state.value.lower()>``. A plain
+        function defined on the class is stored unbound, so the handler map
+        holds no reference back to the machine. Anything else (staticmethod,
+        classmethod, instance attribute, ``__getattr__``) is resolved the
+        usual way and wrapped to take the same ``(machine, context)``
+        arguments. Called once per state by ``initialize()``.
 
         Raises:
             AttributeError: If no matching method is found.
         """
         name = f"_handle_{state.value.lower()}"
-        handler = getattr(self, name, None)
-        if handler is None:
+        cls = type(self)
+        attr = inspect.getattr_static(cls, name, None)
+        if isinstance(attr, FunctionType):
+            return attr
+
+        if isinstance(attr, (staticmethod, classmethod)):
+            bound = attr.__get__(None, cls)
+        else:
+            bound = getattr(self, name, None)
+        if bound is None:
             raise AttributeError(
                 f"No handler '{name}' found on {self.__class__.__name__}. "
                 f"Implement this method to handle the '{state.name}' state."
             )
-        return handler
+        return lambda _machine, context: bound(context)
 
     def _get_next_state(self, current_state: Enum, result: StateResult) -> Optional[Enum]:
         """
@@ -318,10 +460,18 @@ class StateMachine(ABC):
         Returns the first transition from current_state whose condition
         passes, or None if no valid transition exists.
         """
-        for transition in self._transition_map.get(current_state, []):
+        if self._next_state_table is not None:
+            return self._next_state_table.get(current_state)
+
+        entry = self._transition_map.get(current_state)
+        if entry is None:
+            return None
+
+        conditional, fallback = entry
+        for transition in conditional:
             if transition.can_transition():
                 return transition.to_state
-        return None
+        return fallback
 
     # ------------------------------------------------------------------
     # Watchdog
@@ -340,7 +490,7 @@ class StateMachine(ABC):
         self._watchdog_timeout = timeout_seconds
         self._watchdog_last_activity = time.time()
         self._watchdog_warned = False
-        logger.info(f"Watchdog enabled: {timeout_seconds:.0f}s idle threshold")
+        logger.info("Watchdog enabled: %.0fs idle threshold", timeout_seconds)
 
     def record_activity(self) -> None:
         """Reset the watchdog timer. Call this when meaningful progress is made."""
@@ -363,9 +513,7 @@ class StateMachine(ABC):
         warn_at = self._watchdog_timeout * 0.8
         if idle >= warn_at and not self._watchdog_warned:
             remaining = self._watchdog_timeout - idle
-            logger.warning(
-                f"Watchdog: idle {idle:.0f}s — will stop in {remaining:.0f}s"
-            )
+            logger.warning("Watchdog: idle %.0fs — will stop in %.0fs", idle, remaining)
             self._watchdog_warned = True
 
     # ------------------------------------------------------------------
@@ -378,16 +526,18 @@ class StateMachine(ABC):
 
     def get_history(self, last_n: Optional[int] = None) -> List[StateHistoryEntry]:
         """
-        Return execution history.
+        Return execution history, oldest first.
 
         Args:
             last_n: If provided, return only the last N entries.
         """
-        history = list(self._state_history)
-        return history[-last_n:] if last_n is not None else history
+        if last_n is None:
+            return list(self._state_history)
+        start = max(0, len(self._state_history) - last_n)
+        return list(itertools.islice(self._state_history, start, None))
 
     def reset(self) -> None:
         """Reset the machine to its initial state and clear retry counts."""
         self._current_state = self.get_initial_state()
         self._retry_counts.clear()
-        logger.info(f"Reset to {self._current_state.name}")
+        logger.info("Reset to %s", self._current_state.name)
@@ -24,17 +24,18 @@ class StateResult(Enum):
 
     SUCCESS = "success"   # State completed successfully, proceed to next state
     FAILURE = "failure"   # State failed, may retry or transition to failover
-    RETRY = "retry"       # State should be retried immediately
+    RETRY = "retry"       # State should be retried after an exponential backoff
     SKIP = "skip"         # State skipped (condition not met), proceed to next
     TIMEOUT = "timeout"   # State timed out, transition to failover
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StateMetadata:
     """
     Metadata and configuration for a single state.
 
     Defines retry behaviour, timeouts, and failover logic for a state.
+    Instances are immutable and may be shared between machines.
 
     Args:
         name: Display name for the state.
@@ -60,10 +61,10 @@ class StateMetadata:
             raise ValueError(f"timeout must be > 0 or None, got {self.timeout}")
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StateTransition:
     """
-    Defines a transition between two states.
+    Defines a transition between two states. Instances are immutable.
 
     Args:
         from_state: The state this transition originates from.
@@ -93,12 +94,13 @@ class StateTransition:
             return False
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class StateHistoryEntry:
     """
-    Records the execution of a single state.
+    Records the execution of a single state. Instances are immutable.
 
     Tracks timing, result, and retry information for debugging and analysis.
+    ``metadata`` is None unless the caller supplies a dict.
     """
 
     state: Enum
@@ -107,12 +109,12 @@ class StateHistoryEntry:
     timestamp: float = field(default_factory=time.time)
     retry_count: int = 0
     error_message: Optional[str] = None
-    metadata: dict = field(default_factory=dict)
+    metadata: Optional[dict] = None
 
     @property
     def succeeded(self) -> bool:
         """True if the state completed successfully."""
-        return self.result == StateResult.SUCCESS
+        return self.result is StateResult.SUCCESS
 
     @property
     def failed(self) -> bool:
@@ -128,29 +130,44 @@ class StateHistoryEntry:
             "timestamp": self.timestamp,
             "retry_count": self.retry_count,
             "error_message": self.error_message,
-            "metadata": self.metadata,
+            "metadata": self.metadata if self.metadata is not None else {},
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class StateExecutionContext:
     """
     Runtime context passed to every state handler.
 
     Provides timing information and retry count so handlers can make
-    decisions based on how long they have been running.
+    decisions based on how long they have been running. StateMachine
+    reuses one instance per machine, resetting it before each attempt.
 
     Args:
         current_state: The state currently being executed.
         retry_count: How many times this state has been retried so far.
         start_time: Epoch time when execution began (defaults to now).
+
+    Attributes:
         metadata: Arbitrary key/value pairs for handler-specific data.
+                  The dict is only allocated on first access.
     """
 
     current_state: Enum
     retry_count: int = 0
     start_time: float = field(default_factory=time.time)
-    metadata: dict = field(default_factory=dict)
+    _metadata: Optional[dict] = field(default=None, init=False, repr=False)
+
+    @property
+    def metadata(self) -> dict:
+        """Handler-specific key/value pairs, created empty on first access."""
+        if self._metadata is None:
+            self._metadata = {}
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: dict) -> None:
+        self._metadata = value
 
     @property
     def elapsed_time(self) -> float:
@@ -170,3 +187,9 @@ class StateExecutionContext:
         if timeout is None:
             return False
         return self.elapsed_time >= timeout
+
+    def set_metadata(self, key: str, value) -> None:
+        """Store a handler-specific value, creating the metadata dict on first use."""
+        if self._metadata is None:
+            self._metadata = {}
+        self._metadata[key] = value
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark for the engine's retry loop.
+
+The handler's numeric work goes through ``jit_kernel`` (compiled by numba
+when installed, plain Python otherwise), so with numba the timing is
+dominated by the engine's per-attempt dispatch rather than handler code.
+
+Not collected by pytest. Run from the repository root:
+    python -m tests.bench_retry
+"""
+
+import importlib.util
+import timeit
+from enum import Enum
+
+from statemachine import StateMachine, StateMetadata, StateResult, jit_kernel
+
+RETRIES = 10_000
+REPEAT = 5
+
+
+class Steps(Enum):
+    WORK = "work"
+
+
+@jit_kernel
+def _body(n):
+    # Integer-only so numba stays in nopython mode
+    total = 0
+    for i in range(n % 16):
+        total += i * i
+    return total
+
+
+class RetryMachine(StateMachine):
+    __slots__ = ()
+
+    def define_states(self): return Steps
+    def define_state_metadata(self):
+        return {Steps.WORK: StateMetadata(name="Work", max_retries=RETRIES)}
+    def define_transitions(self): return []
+    def get_initial_state(self): return Steps.WORK
+
+    def _handle_work(self, ctx):
+        # Fail every attempt except the last one permitted
+        _body(ctx.retry_count)
+        return StateResult.SUCCESS if ctx.retry_count >= RETRIES else StateResult.FAILURE
+
+
+def main() -> None:
+    machine = RetryMachine()
+    machine.initialize()
+    _body(0)  # pay any JIT compilation cost outside the timed runs
+
+    best = min(timeit.repeat(machine.run, number=1, repeat=REPEAT))
+    attempts = RETRIES + 1
+    numba = importlib.util.find_spec("numba") is not None
+    print(
+        f"{attempts} attempts: best of {REPEAT} = {best * 1e3:.1f} ms "
+        f"({best / attempts * 1e6:.2f} µs/attempt, numba: {'yes' if numba else 'no'})"
+    )
+
+
+if __name__ == "__main__":
+    main()
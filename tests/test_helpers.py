@@ -1,10 +1,22 @@
 """Tests for statemachine.helpers."""
 
+import os
+import subprocess
+import sys
+import types
 from enum import Enum
 
 import pytest
 
-from statemachine.helpers import build_metadata_dict, create_state_metadata, log_state_execution
+import statemachine
+from statemachine.helpers import (
+    _UPPER_NAMES,
+    _load_njit,
+    build_metadata_dict,
+    create_state_metadata,
+    jit_kernel,
+    log_state_execution,
+)
 from statemachine.types import StateExecutionContext, StateMetadata, StateResult
 
 
@@ -114,6 +126,18 @@ class TestLogStateExecution:
         bot = self._make_handler(StateResult.RETRY)
         assert bot._handle_a(self._ctx()) == StateResult.RETRY
 
+    def test_logs_entry_and_exit_messages(self, caplog):
+        bot = self._make_handler(StateResult.RETRY)
+        with caplog.at_level("DEBUG", logger="statemachine.helpers"):
+            bot._handle_a(self._ctx())
+        assert [r.getMessage() for r in caplog.records] == ["A: Starting...", "A: Retrying..."]
+
+    def test_no_exit_message_for_skip(self, caplog):
+        bot = self._make_handler(StateResult.SKIP)
+        with caplog.at_level("DEBUG", logger="statemachine.helpers"):
+            bot._handle_a(self._ctx())
+        assert [r.getMessage() for r in caplog.records] == ["A: Starting..."]
+
     def test_preserves_function_name(self):
         class FakeBot:
             @log_state_execution
@@ -121,3 +145,70 @@ class TestLogStateExecution:
                 return StateResult.SUCCESS
 
         assert FakeBot._handle_a.__name__ == "_handle_a"
+
+    def test_state_name_cached_after_first_call(self):
+        bot = self._make_handler(StateResult.SUCCESS)
+        bot._handle_a(self._ctx())
+        assert _UPPER_NAMES[(Steps, Steps.A)] == "A"
+
+    def test_mixin_enums_with_equal_values_cached_separately(self, caplog):
+        class Fetch(str, Enum):
+            FETCH = "step"
+
+        class Save(str, Enum):
+            SAVE = "step"
+
+        bot = self._make_handler(StateResult.SUCCESS)
+        with caplog.at_level("DEBUG", logger="statemachine.helpers"):
+            bot._handle_a(StateExecutionContext(current_state=Fetch.FETCH))
+            bot._handle_a(StateExecutionContext(current_state=Save.SAVE))
+        assert [r.getMessage() for r in caplog.records] == [
+            "FETCH: Starting...", "FETCH: Complete", "SAVE: Starting...", "SAVE: Complete",
+        ]
+
+
+# ── jit_kernel ─────────────────────────────────────────────────────────────────
+
+def _sum_squares(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+class TestJitKernel:
+    def test_bare_decorator(self):
+        assert jit_kernel(_sum_squares)(4) == 14
+
+    def test_decorator_with_options(self):
+        assert jit_kernel(cache=False)(_sum_squares)(4) == 14
+
+    def test_uses_numba_when_available(self, monkeypatch):
+        compiled = []
+
+        def njit(**options):
+            def compile(f):
+                compiled.append((f, options))
+                return f
+            return compile
+
+        monkeypatch.setitem(sys.modules, "numba", types.SimpleNamespace(njit=njit))
+        _load_njit.cache_clear()
+        try:
+            jit_kernel(_sum_squares)
+        finally:
+            _load_njit.cache_clear()
+        assert compiled == [(_sum_squares, {"cache": True})]
+
+    def test_numba_not_imported_with_package(self, tmp_path):
+        # A stub numba on the path would be imported if loading were eager
+        (tmp_path / "numba.py").write_text("def njit(**kw): return lambda f: f\n")
+        package_root = os.path.dirname(os.path.dirname(statemachine.__file__))
+        code = "import sys, statemachine; print('numba' in sys.modules)"
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            env={**os.environ, "PYTHONPATH": os.pathsep.join([str(tmp_path), package_root])},
+            capture_output=True,
+            text=True,
+        )
+        assert out.stdout.strip() == "False", out.stderr
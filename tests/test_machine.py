@@ -1,8 +1,11 @@
 """Tests for statemachine.machine — the core engine."""
 
+import gc
 import time
+import weakref
 from enum import Enum
-from typing import Dict, List
+from types import SimpleNamespace
+from typing import Dict, List, Optional
 
 import pytest
 
@@ -24,56 +27,112 @@ class Steps(Enum):
     ERROR = "error"
 
 
-def _meta(name, **kwargs) -> StateMetadata:
-    return StateMetadata(name=name, **kwargs)
+# Shared by every machine that needs plain metadata; safe because
+# StateMetadata is frozen and the engine never mutates the mapping.
+_DEFAULT_META = {s: StateMetadata(name=s.name) for s in Steps}
 
 
-def _simple_machine(handlers: Dict[Steps, StateResult], transitions=None) -> StateMachine:
+_LINEAR_TRANSITIONS = [
+    StateTransition(Steps.A, Steps.B),
+    StateTransition(Steps.B, Steps.C),
+]
+
+
+class RecordingMachine(StateMachine):
+    """
+    Minimal machine where each state returns a fixed result.
+
+    Defined once; per-test behaviour comes from constructor arguments.
+    Every handler call appends the state's value to ``self.visited``.
+    """
+
+    def __init__(
+        self,
+        handlers: Optional[Dict[Steps, StateResult]] = None,
+        transitions: Optional[List[StateTransition]] = None,
+        metadata: Optional[Dict[Steps, StateMetadata]] = None,
+    ):
+        super().__init__()
+        self.handlers = handlers or {}
+        self.transitions = _LINEAR_TRANSITIONS if transitions is None else transitions
+        self.metadata = metadata or {}
+        self.visited: List[str] = []
+
+    def define_states(self): return Steps
+    def define_state_metadata(self):
+        return {**_DEFAULT_META, **self.metadata} if self.metadata else _DEFAULT_META
+    def define_transitions(self): return self.transitions
+    def get_initial_state(self): return Steps.A
+
+    def _record(self, state: Steps) -> StateResult:
+        self.visited.append(state.value)
+        return self.handlers.get(state, StateResult.SUCCESS)
+
+    def _handle_a(self, ctx): return self._record(Steps.A)
+    def _handle_b(self, ctx): return self._record(Steps.B)
+    def _handle_c(self, ctx): return self._record(Steps.C)
+    def _handle_error(self, ctx): return self._record(Steps.ERROR)
+
+
+@pytest.fixture(scope="module")
+def machine_factory():
     """
-    Build a minimal machine where each state returns a fixed result.
+    Return a factory for fresh RecordingMachine instances.
 
     transitions defaults to A → B → C (linear chain).
     """
-    if transitions is None:
-        transitions = [
-            StateTransition(Steps.A, Steps.B),
-            StateTransition(Steps.B, Steps.C),
-        ]
+    def make(handlers=None, transitions=None, metadata=None) -> RecordingMachine:
+        return RecordingMachine(handlers, transitions, metadata)
+
+    return make
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    """
+    Replace the engine's clock with one that only moves when told to.
 
-    class M(StateMachine):
-        def define_states(self): return Steps
-        def define_state_metadata(self):
-            return {s: _meta(s.name) for s in Steps}
-        def define_transitions(self): return transitions
-        def get_initial_state(self): return Steps.A
+    Returns a one-element list holding the current time; advance it with
+    ``fake_clock[0] += seconds``. sleep advances it instead of blocking.
+    Only the ``time`` name inside statemachine.machine is swapped, so the
+    real time module (and pytest's own timing) is left untouched.
+    """
+    clock = [1000.0]
 
-        def _handle_a(self, ctx): return handlers.get(Steps.A, StateResult.SUCCESS)
-        def _handle_b(self, ctx): return handlers.get(Steps.B, StateResult.SUCCESS)
-        def _handle_c(self, ctx): return handlers.get(Steps.C, StateResult.SUCCESS)
-        def _handle_error(self, ctx): return handlers.get(Steps.ERROR, StateResult.SUCCESS)
+    def sleep(seconds):
+        clock[0] += seconds
 
-    return M()
+    monkeypatch.setattr(
+        "statemachine.machine.time", SimpleNamespace(time=lambda: clock[0], sleep=sleep)
+    )
+    return clock
 
 
 # ── Initialisation ─────────────────────────────────────────────────────────────
 
 class TestInitialisation:
-    def test_initialises_on_first_run(self):
-        m = _simple_machine({})
+    @pytest.fixture(scope="class")
+    @classmethod
+    def initialised_machine(cls, machine_factory):
+        """Initialised once and shared by read-only tests in this class."""
+        m = machine_factory()
+        m.initialize()
+        return m
+
+    def test_initialises_on_first_run(self, machine_factory):
+        m = machine_factory()
         assert not m._initialized
         m.initialize()
         assert m._initialized
 
-    def test_double_initialise_is_safe(self):
-        m = _simple_machine({})
+    def test_double_initialise_is_safe(self, machine_factory):
+        m = machine_factory()
         m.initialize()
         m.initialize()  # should not raise
         assert m._initialized
 
-    def test_initial_state_set(self):
-        m = _simple_machine({})
-        m.initialize()
-        assert m.get_current_state() == Steps.A
+    def test_initial_state_set(self, initialised_machine):
+        assert initialised_machine.get_current_state() == Steps.A
 
     def test_missing_metadata_raises(self):
         class Bad(StateMachine):
@@ -92,7 +151,7 @@ class TestInitialisation:
 
         class Bad(StateMachine):
             def define_states(self): return Steps
-            def define_state_metadata(self): return {s: _meta(s.name) for s in Steps}
+            def define_state_metadata(self): return _DEFAULT_META
             def define_transitions(self): return []
             def get_initial_state(self): return Other.X
             def _handle_a(self, ctx): return StateResult.SUCCESS
@@ -106,7 +165,7 @@ class TestInitialisation:
 
         class Bad(StateMachine):
             def define_states(self): return Steps
-            def define_state_metadata(self): return {s: _meta(s.name) for s in Steps}
+            def define_state_metadata(self): return _DEFAULT_META
             def define_transitions(self):
                 return [StateTransition(Other.X, Steps.B)]
             def get_initial_state(self): return Steps.A
@@ -115,49 +174,182 @@ class TestInitialisation:
         with pytest.raises(ValueError, match="from_state"):
             Bad().initialize()
 
+    def test_missing_handler_raises_on_initialise(self):
+        class Bad(StateMachine):
+            def define_states(self): return Steps
+            def define_state_metadata(self): return _DEFAULT_META
+            def define_transitions(self): return []
+            def get_initial_state(self): return Steps.A
+            def _handle_a(self, ctx): return StateResult.SUCCESS
+            # _handle_b / _handle_c / _handle_error deliberately omitted
 
-# ── Happy-path execution ───────────────────────────────────────────────────────
+        with pytest.raises(AttributeError, match="_handle_b"):
+            Bad().initialize()
 
-class TestExecution:
-    def test_states_execute_in_order(self):
-        order = []
+    def test_handlers_resolved_at_initialise(self, initialised_machine):
+        m = initialised_machine
+        assert m._handler_map[Steps.A] is RecordingMachine._handle_a
+        assert set(m._handler_map) == set(Steps)
+
+    def test_staticmethod_handler(self):
+        seen = []
+
+        class M(RecordingMachine):
+            @staticmethod
+            def _handle_a(ctx):
+                seen.append(ctx.current_state)
+                return StateResult.SUCCESS
+
+        m = M(transitions=[])
+        m.run()
+        assert seen == [Steps.A]
+        assert m.get_history()[0].succeeded
+
+    def test_classmethod_handler(self):
+        seen = []
+
+        class M(RecordingMachine):
+            @classmethod
+            def _handle_a(cls, ctx):
+                seen.append(cls)
+                return StateResult.SUCCESS
 
+        m = M(transitions=[])
+        m.run()
+        assert seen == [M]
+        assert m.get_history()[0].succeeded
+
+    def test_handler_supplied_by_getattr(self):
         class M(StateMachine):
             def define_states(self): return Steps
-            def define_state_metadata(self): return {s: _meta(s.name) for s in Steps}
-            def define_transitions(self):
-                return [StateTransition(Steps.A, Steps.B), StateTransition(Steps.B, Steps.C)]
+            def define_state_metadata(self): return _DEFAULT_META
+            def define_transitions(self): return []
+            def get_initial_state(self): return Steps.A
+
+            def __getattr__(self, name):
+                if name.startswith("_handle_"):
+                    return lambda ctx: StateResult.SUCCESS
+                raise AttributeError(name)
+
+        m = M()
+        m.run()
+        assert m.get_history()[0].succeeded
+
+    def test_initialised_machine_freed_without_gc(self, machine_factory):
+        m = machine_factory()
+        m.run()
+        ref = weakref.ref(m)
+        gc.disable()
+        try:
+            del m
+            assert ref() is None  # no reference cycle through the handler map
+        finally:
+            gc.enable()
+
+    def test_slotted_subclass_has_no_instance_dict(self):
+        class Slotted(StateMachine):
+            __slots__ = ()
+            def define_states(self): return Steps
+            def define_state_metadata(self): return _DEFAULT_META
+            def define_transitions(self): return []
             def get_initial_state(self): return Steps.A
-            def _handle_a(self, ctx): order.append("a"); return StateResult.SUCCESS
-            def _handle_b(self, ctx): order.append("b"); return StateResult.SUCCESS
-            def _handle_c(self, ctx): order.append("c"); return StateResult.SUCCESS
+            def _handle_a(self, ctx): return StateResult.SUCCESS
+            def _handle_b(self, ctx): return StateResult.SUCCESS
+            def _handle_c(self, ctx): return StateResult.SUCCESS
             def _handle_error(self, ctx): return StateResult.SUCCESS
 
-        M().run()
-        assert order == ["a", "b", "c"]
+        m = Slotted()
+        m.run()
+        assert not hasattr(m, "__dict__")
+        assert weakref.ref(m)() is m
 
-    def test_history_recorded(self):
-        m = _simple_machine({})
+    def test_unslotted_subclass_can_add_attributes(self, machine_factory):
+        m = machine_factory()
+        m.orders_processed = 1
         m.run()
-        history = m.get_history()
+        assert m.orders_processed == 1
+
+
+# ── Happy-path execution ───────────────────────────────────────────────────────
+
+class TestExecution:
+    @pytest.fixture(scope="class")
+    @classmethod
+    def ran_machine(cls, machine_factory):
+        """Run once and shared by read-only history tests in this class."""
+        m = machine_factory()
+        m.run()
+        return m
+
+    def test_states_execute_in_order(self, machine_factory):
+        m = machine_factory()
+        m.run()
+        assert m.visited == ["a", "b", "c"]
+
+    def test_history_recorded(self, ran_machine):
+        history = ran_machine.get_history()
         states = [e.state for e in history]
         assert Steps.A in states
         assert Steps.B in states
 
-    def test_history_last_n(self):
-        m = _simple_machine({})
+    def test_history_last_n(self, ran_machine):
+        assert len(ran_machine.get_history(last_n=1)) == 1
+
+    def test_history_last_n_keeps_most_recent_in_order(self, ran_machine):
+        m = ran_machine
+        assert [e.state for e in m.get_history(last_n=2)] == [Steps.B, Steps.C]
+        assert [e.state for e in m.get_history(last_n=50)] == [Steps.A, Steps.B, Steps.C]
+        assert m.get_history(last_n=0) == []
+
+    def test_history_bounded_by_max_history(self):
+        class Short(RecordingMachine):
+            MAX_HISTORY = 4
+
+        m = Short()
+        for _ in range(3):  # 9 executions, only the last 4 kept
+            m.reset()
+            m.run()
+        history = m.get_history()
+        assert [e.state for e in history] == [Steps.C, Steps.A, Steps.B, Steps.C]
+        assert [e.state for e in m.get_history(last_n=2)] == [Steps.B, Steps.C]
+
+    def test_zero_max_history_keeps_nothing(self):
+        class NoHistory(RecordingMachine):
+            MAX_HISTORY = 0
+
+        m = NoHistory()
         m.run()
-        assert len(m.get_history(last_n=1)) == 1
+        assert m.visited == ["a", "b", "c"]
+        assert m.get_history() == []
 
-    def test_no_transitions_means_single_state(self):
-        m = _simple_machine({}, transitions=[])
+    def test_no_transitions_means_single_state(self, machine_factory):
+        m = machine_factory(transitions=[])
         m.run()
         assert m.get_current_state() == Steps.A
 
+    def test_self_transition_reexecutes_state(self, machine_factory):
+        m = machine_factory(transitions=[
+            StateTransition(Steps.A, Steps.A, condition=lambda: m.visited.count("a") < 3),
+            StateTransition(Steps.A, Steps.B),
+        ])
+        m.run()
+        assert m.visited == ["a", "a", "a", "b"]
+        assert [e.state for e in m.get_history()] == [Steps.A] * 3 + [Steps.B]
+
+    def test_handler_can_write_context_metadata(self):
+        class M(RecordingMachine):
+            def _handle_a(self, ctx):
+                ctx.metadata["k"] = 1
+                return StateResult.SUCCESS
+
+        m = M(transitions=[])
+        m.run()
+        assert m.get_history()[0].succeeded
+
     def test_missing_handler_raises_attribute_error(self):
         class M(StateMachine):
             def define_states(self): return Steps
-            def define_state_metadata(self): return {s: _meta(s.name) for s in Steps}
+            def define_state_metadata(self): return _DEFAULT_META
             def define_transitions(self): return []
             def get_initial_state(self): return Steps.A
             # _handle_a deliberately omitted
@@ -172,44 +364,67 @@ class TestRetryLogic:
     def test_state_retried_on_failure(self):
         calls = []
 
-        class M(StateMachine):
-            def define_states(self): return Steps
-            def define_state_metadata(self):
-                return {s: StateMetadata(name=s.name, max_retries=2) for s in Steps}
-            def define_transitions(self): return []
-            def get_initial_state(self): return Steps.A
+        class M(RecordingMachine):
             def _handle_a(self, ctx):
                 calls.append(ctx.retry_count)
                 # succeed on the third attempt
                 return StateResult.SUCCESS if ctx.retry_count >= 2 else StateResult.FAILURE
-            def _handle_b(self, ctx): return StateResult.SUCCESS
-            def _handle_c(self, ctx): return StateResult.SUCCESS
-            def _handle_error(self, ctx): return StateResult.SUCCESS
 
-        M().run()
+        M(transitions=[], metadata={Steps.A: StateMetadata(name="A", max_retries=2)}).run()
         assert len(calls) == 3  # attempt 0, retry 1, retry 2
 
     def test_retry_count_passed_to_handler(self):
         counts = []
 
-        class M(StateMachine):
-            def define_states(self): return Steps
-            def define_state_metadata(self):
-                return {s: StateMetadata(name=s.name, max_retries=1) for s in Steps}
-            def define_transitions(self): return []
-            def get_initial_state(self): return Steps.A
+        class M(RecordingMachine):
             def _handle_a(self, ctx):
                 counts.append(ctx.retry_count)
                 return StateResult.FAILURE
-            def _handle_b(self, ctx): return StateResult.SUCCESS
-            def _handle_c(self, ctx): return StateResult.SUCCESS
-            def _handle_error(self, ctx): return StateResult.SUCCESS
 
-        M().run()
+        M(transitions=[], metadata={Steps.A: StateMetadata(name="A", max_retries=1)}).run()
         assert counts == [0, 1]
 
-    def test_success_resets_retry_count(self):
-        m = _simple_machine({})
+    def test_long_retry_chain_does_not_recurse(self):
+        calls = []
+
+        class M(RecordingMachine):
+            def _handle_a(self, ctx):
+                calls.append(ctx.retry_count)
+                return StateResult.FAILURE
+
+        m = M(transitions=[], metadata={Steps.A: StateMetadata(name="A", max_retries=5000)})
+        m.run()  # would raise RecursionError if retries recursed
+        assert len(calls) == 5001
+
+    def test_retry_result_backs_off_exponentially_up_to_cap(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr(
+            "statemachine.machine.time", SimpleNamespace(time=time.time, sleep=sleeps.append)
+        )
+        results = iter([StateResult.RETRY] * 4 + [StateResult.SUCCESS])
+
+        class M(RecordingMachine):
+            RETRY_BACKOFF_BASE = 0.01
+            RETRY_BACKOFF_CAP = 0.03
+            def _handle_a(self, ctx): return next(results)
+
+        M(transitions=[]).run()
+        assert sleeps == [0.01, 0.02, 0.03, 0.03]
+
+    def test_context_reset_between_attempts(self):
+        seen = []
+
+        class M(RecordingMachine):
+            def _handle_a(self, ctx):
+                seen.append((ctx.current_state, ctx.retry_count, dict(ctx.metadata)))
+                ctx.set_metadata("touched", True)
+                return StateResult.FAILURE
+
+        M(transitions=[], metadata={Steps.A: StateMetadata(name="A", max_retries=1)}).run()
+        assert seen == [(Steps.A, 0, {}), (Steps.A, 1, {})]
+
+    def test_success_resets_retry_count(self, machine_factory):
+        m = machine_factory()
         m.run()
         assert m._retry_counts.get(Steps.A, 0) == 0
 
@@ -217,154 +432,164 @@ class TestRetryLogic:
 # ── Failover ───────────────────────────────────────────────────────────────────
 
 class TestFailover:
-    def test_failover_state_jumped_to_after_max_retries(self):
-        visited = []
+    def test_failover_state_jumped_to_after_max_retries(self, machine_factory):
+        m = machine_factory(
+            {Steps.A: StateResult.FAILURE},
+            transitions=[StateTransition(Steps.A, Steps.B)],
+            metadata={
+                Steps.A: StateMetadata(name="A", max_retries=0, failover_state=Steps.ERROR),
+            },
+        )
+        m.run()
+        assert "error" in m.visited
+        assert "b" not in m.visited
 
-        class M(StateMachine):
-            def define_states(self): return Steps
-            def define_state_metadata(self):
-                return {
-                    Steps.A: StateMetadata(name="A", max_retries=0, failover_state=Steps.ERROR),
-                    Steps.B: StateMetadata(name="B"),
-                    Steps.C: StateMetadata(name="C"),
-                    Steps.ERROR: StateMetadata(name="Error"),
-                }
-            def define_transitions(self):
-                return [StateTransition(Steps.A, Steps.B)]
-            def get_initial_state(self): return Steps.A
-            def _handle_a(self, ctx): visited.append("a"); return StateResult.FAILURE
-            def _handle_b(self, ctx): visited.append("b"); return StateResult.SUCCESS
-            def _handle_c(self, ctx): visited.append("c"); return StateResult.SUCCESS
-            def _handle_error(self, ctx): visited.append("error"); return StateResult.SUCCESS
+    def test_handler_exception_recorded_as_failure(self, caplog):
+        class M(RecordingMachine):
+            def _handle_a(self, ctx): raise RuntimeError("boom")
 
-        m = M()
+        m = M(transitions=[], metadata={Steps.A: StateMetadata(name="A", max_retries=0)})
         m.run()
-        assert "error" in visited
-        assert "b" not in visited
+        entry = m.get_history()[-1]
+        assert entry.result == StateResult.FAILURE
+        assert entry.error_message == "boom"
+        assert any(r.exc_info and "Error in A: boom" in r.getMessage() for r in caplog.records)
 
-    def test_no_failover_just_logs_error(self):
+    def test_no_failover_just_logs_error(self, machine_factory):
         # Should not raise — just logs and returns FAILURE
-        m = _simple_machine({Steps.A: StateResult.FAILURE}, transitions=[])
+        m = machine_factory({Steps.A: StateResult.FAILURE}, transitions=[])
         m.run()  # no exception expected
 
 
 # ── Timeout ────────────────────────────────────────────────────────────────────
 
 class TestTimeout:
-    def test_state_times_out(self):
-        results = []
-
-        class M(StateMachine):
-            def define_states(self): return Steps
-            def define_state_metadata(self):
-                return {
-                    Steps.A: StateMetadata(name="A", max_retries=0, timeout=0.05),
-                    Steps.B: StateMetadata(name="B"),
-                    Steps.C: StateMetadata(name="C"),
-                    Steps.ERROR: StateMetadata(name="Error"),
-                }
-            def define_transitions(self): return []
-            def get_initial_state(self): return Steps.A
-            def _handle_a(self, ctx):
-                # Keep returning RETRY so the timeout loop runs
-                return StateResult.RETRY
-            def _handle_b(self, ctx): return StateResult.SUCCESS
-            def _handle_c(self, ctx): return StateResult.SUCCESS
-            def _handle_error(self, ctx): return StateResult.SUCCESS
-
-        m = M()
+    def test_state_times_out(self, machine_factory, fake_clock):
+        # A keeps returning RETRY so the timeout loop runs
+        m = machine_factory(
+            {Steps.A: StateResult.RETRY},
+            transitions=[],
+            metadata={Steps.A: StateMetadata(name="A", max_retries=0, timeout=0.05)},
+        )
         m.run()
         history = m.get_history()
         # The final recorded result for A should be TIMEOUT
         a_entries = [e for e in history if e.state == Steps.A]
         assert any(e.result.value == "timeout" for e in a_entries)
+        # Backoff sleeps stop at the deadline rather than overshooting it
+        assert fake_clock[0] == pytest.approx(1000.05)
+
+    @pytest.mark.slow
+    def test_state_times_out_on_real_clock(self, machine_factory):
+        m = machine_factory(
+            {Steps.A: StateResult.RETRY},
+            transitions=[],
+            metadata={Steps.A: StateMetadata(name="A", max_retries=0, timeout=0.05)},
+        )
+        m.run()
+        entry = m.get_history()[-1]
+        assert entry.result == StateResult.TIMEOUT
+        assert 0.05 <= entry.duration < 1.0
 
 
 # ── Watchdog ───────────────────────────────────────────────────────────────────
 
 class TestWatchdog:
-    def test_watchdog_raises_when_idle_too_long(self):
-        class M(StateMachine):
-            def define_states(self): return Steps
-            def define_state_metadata(self): return {s: _meta(s.name) for s in Steps}
-            def define_transitions(self): return []
-            def get_initial_state(self): return Steps.A
-            def _handle_a(self, ctx): return StateResult.SUCCESS
-            def _handle_b(self, ctx): return StateResult.SUCCESS
-            def _handle_c(self, ctx): return StateResult.SUCCESS
-            def _handle_error(self, ctx): return StateResult.SUCCESS
-
-        m = M()
-        m.enable_watchdog(timeout_seconds=0.001)
-        # Backdate last activity so the watchdog fires immediately
-        m._watchdog_last_activity = time.time() - 10.0
+    def test_watchdog_raises_when_idle_too_long(self, machine_factory, fake_clock):
+        m = machine_factory(transitions=[])
+        m.enable_watchdog(timeout_seconds=5.0)
+        fake_clock[0] += 10.0
 
         with pytest.raises(RuntimeError, match="Watchdog"):
             m.run()
 
-    def test_record_activity_resets_watchdog(self):
-        m = _simple_machine({})
+    def test_record_activity_resets_watchdog(self, machine_factory, fake_clock):
+        m = machine_factory()
         m.enable_watchdog(timeout_seconds=60.0)
-        m._watchdog_last_activity = time.time() - 10.0
+        fake_clock[0] += 50.0
         m.record_activity()
-        # Should not raise
+        fake_clock[0] += 50.0
+        # 100s since enabling, but only 50s since the last activity
         m._check_watchdog()
 
-    def test_watchdog_disabled_by_default(self):
-        m = _simple_machine({})
-        m._watchdog_last_activity = time.time() - 99999
+    def test_watchdog_disabled_by_default(self, machine_factory, fake_clock):
+        m = machine_factory()
+        fake_clock[0] += 99999
         m._check_watchdog()  # should not raise
 
 
 # ── Conditional transitions ────────────────────────────────────────────────────
 
 class TestConditionalTransitions:
-    def test_condition_false_skips_transition(self):
-        visited = []
+    def test_condition_false_skips_transition(self, machine_factory):
+        m = machine_factory(transitions=[
+            StateTransition(Steps.A, Steps.B, condition=lambda: False),
+        ])
+        m.run()
+        assert "b" not in m.visited
 
-        class M(StateMachine):
-            def define_states(self): return Steps
-            def define_state_metadata(self): return {s: _meta(s.name) for s in Steps}
-            def define_transitions(self):
-                return [StateTransition(Steps.A, Steps.B, condition=lambda: False)]
-            def get_initial_state(self): return Steps.A
-            def _handle_a(self, ctx): visited.append("a"); return StateResult.SUCCESS
-            def _handle_b(self, ctx): visited.append("b"); return StateResult.SUCCESS
-            def _handle_c(self, ctx): return StateResult.SUCCESS
-            def _handle_error(self, ctx): return StateResult.SUCCESS
+    def test_condition_true_allows_transition(self, machine_factory):
+        m = machine_factory(transitions=[
+            StateTransition(Steps.A, Steps.B, condition=lambda: True),
+        ])
+        m.run()
+        assert "b" in m.visited
 
-        M().run()
-        assert "b" not in visited
+    def test_first_matching_transition_wins(self, machine_factory):
+        m = machine_factory(transitions=[
+            StateTransition(Steps.A, Steps.C, condition=lambda: False),
+            StateTransition(Steps.A, Steps.B),
+            StateTransition(Steps.A, Steps.ERROR),
+        ])
+        m.initialize()
+        assert m._get_next_state(Steps.A, StateResult.SUCCESS) == Steps.B
+        assert m._get_next_state(Steps.B, StateResult.SUCCESS) is None
 
-    def test_condition_true_allows_transition(self):
-        visited = []
+    def test_unconditional_first_transition_skips_conditions(self, machine_factory):
+        calls = []
+        m = machine_factory(transitions=[
+            StateTransition(Steps.A, Steps.B),
+            StateTransition(Steps.A, Steps.C, condition=lambda: calls.append(1) or True),
+        ])
+        m.initialize()
+        assert m._get_next_state(Steps.A, StateResult.SUCCESS) == Steps.B
+        assert calls == []
 
-        class M(StateMachine):
-            def define_states(self): return Steps
-            def define_state_metadata(self): return {s: _meta(s.name) for s in Steps}
-            def define_transitions(self):
-                return [StateTransition(Steps.A, Steps.B, condition=lambda: True)]
-            def get_initial_state(self): return Steps.A
-            def _handle_a(self, ctx): visited.append("a"); return StateResult.SUCCESS
-            def _handle_b(self, ctx): visited.append("b"); return StateResult.SUCCESS
-            def _handle_c(self, ctx): return StateResult.SUCCESS
-            def _handle_error(self, ctx): return StateResult.SUCCESS
+    def test_condition_free_machine_uses_static_table(self, machine_factory):
+        m = machine_factory()
+        m.initialize()
+        assert m._next_state_table == {Steps.A: Steps.B, Steps.B: Steps.C}
+        assert m._get_next_state(Steps.C, StateResult.SUCCESS) is None
 
-        M().run()
-        assert "b" in visited
+    def test_conditional_machine_has_no_static_table(self, machine_factory):
+        m = machine_factory(transitions=[
+            StateTransition(Steps.A, Steps.B),
+            StateTransition(Steps.B, Steps.C, condition=lambda: True),
+        ])
+        m.initialize()
+        assert m._next_state_table is None
+
+    def test_conditions_before_unconditional_checked_first(self, machine_factory):
+        m = machine_factory(transitions=[
+            StateTransition(Steps.A, Steps.C, condition=lambda: True),
+            StateTransition(Steps.A, Steps.B),
+        ])
+        m.initialize()
+        assert m._get_next_state(Steps.A, StateResult.SUCCESS) == Steps.C
 
 
 # ── Reset ──────────────────────────────────────────────────────────────────────
 
 class TestReset:
-    def test_reset_returns_to_initial_state(self):
-        m = _simple_machine({})
-        m.run()
+    def test_reset_returns_to_initial_state(self, machine_factory):
+        m = machine_factory()
+        m.initialize()
+        m._current_state = Steps.C  # where a full run would have ended
         m.reset()
         assert m.get_current_state() == Steps.A
 
-    def test_reset_clears_retry_counts(self):
-        m = _simple_machine({Steps.A: StateResult.FAILURE})
+    def test_reset_clears_retry_counts(self, machine_factory):
+        m = machine_factory()
         m.initialize()
         m._retry_counts[Steps.A] = 3
         m.reset()
@@ -1,7 +1,8 @@
 """Tests for statemachine.types."""
 
-import time
+import dataclasses
 from enum import Enum
+from types import SimpleNamespace
 
 import pytest
 
@@ -19,6 +20,10 @@ class DummyStates(Enum):
     B = "b"
 
 
+def _raising_condition():
+    raise RuntimeError("boom")
+
+
 # ── StateMetadata ──────────────────────────────────────────────────────────────
 
 class TestStateMetadata:
@@ -28,52 +33,45 @@ class TestStateMetadata:
         assert m.timeout is None
         assert m.failover_state is None
 
-    def test_negative_retries_raises(self):
-        with pytest.raises(ValueError, match="max_retries"):
-            StateMetadata(name="Bad", max_retries=-1)
-
-    def test_zero_timeout_raises(self):
-        with pytest.raises(ValueError, match="timeout"):
-            StateMetadata(name="Bad", timeout=0)
-
-    def test_negative_timeout_raises(self):
-        with pytest.raises(ValueError, match="timeout"):
-            StateMetadata(name="Bad", timeout=-5.0)
-
-    def test_positive_timeout_allowed(self):
-        m = StateMetadata(name="Ok", timeout=0.001)
-        assert m.timeout == 0.001
-
-    def test_zero_retries_allowed(self):
-        m = StateMetadata(name="Ok", max_retries=0)
-        assert m.max_retries == 0
-
-    def test_failover_state_stored(self):
-        m = StateMetadata(name="Ok", failover_state=DummyStates.B)
-        assert m.failover_state == DummyStates.B
+    @pytest.mark.parametrize("kwargs, match", [
+        ({"max_retries": -1}, "max_retries"),
+        ({"timeout": 0}, "timeout"),
+        ({"timeout": -5.0}, "timeout"),
+    ])
+    def test_invalid_values_raise(self, kwargs, match):
+        with pytest.raises(ValueError, match=match):
+            StateMetadata(name="Bad", **kwargs)
+
+    @pytest.mark.parametrize("field_name, value", [
+        ("timeout", 0.001),
+        ("max_retries", 0),
+        ("failover_state", DummyStates.B),
+    ])
+    def test_valid_values_stored(self, field_name, value):
+        m = StateMetadata(name="Ok", **{field_name: value})
+        assert getattr(m, field_name) == value
+
+    def test_is_immutable(self):
+        m = StateMetadata(name="Ok")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            m.max_retries = 10
+
+    def test_slots_enforced(self):
+        assert not hasattr(StateMetadata(name="x"), "__dict__")
 
 
 # ── StateTransition ────────────────────────────────────────────────────────────
 
 class TestStateTransition:
-    def test_no_condition_always_allows(self):
-        t = StateTransition(DummyStates.A, DummyStates.B)
-        assert t.can_transition() is True
-
-    def test_true_condition_allows(self):
-        t = StateTransition(DummyStates.A, DummyStates.B, condition=lambda: True)
-        assert t.can_transition() is True
-
-    def test_false_condition_blocks(self):
-        t = StateTransition(DummyStates.A, DummyStates.B, condition=lambda: False)
-        assert t.can_transition() is False
-
-    def test_raising_condition_blocks(self):
-        def bad():
-            raise RuntimeError("boom")
-
-        t = StateTransition(DummyStates.A, DummyStates.B, condition=bad)
-        assert t.can_transition() is False
+    @pytest.mark.parametrize("condition, expected", [
+        (None, True),
+        (lambda: True, True),
+        (lambda: False, False),
+        (_raising_condition, False),  # exceptions are treated as False
+    ], ids=["no_condition", "true", "false", "raising"])
+    def test_can_transition(self, condition, expected):
+        t = StateTransition(DummyStates.A, DummyStates.B, condition=condition)
+        assert t.can_transition() is expected
 
     def test_condition_called_each_time(self):
         calls = []
@@ -87,6 +85,14 @@ class TestStateTransition:
         t.can_transition()
         assert len(calls) == 2
 
+    def test_is_immutable(self):
+        t = StateTransition(DummyStates.A, DummyStates.B)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            t.to_state = DummyStates.A
+
+    def test_slots_enforced(self):
+        assert not hasattr(StateTransition(DummyStates.A, DummyStates.B), "__dict__")
+
 
 # ── StateHistoryEntry ──────────────────────────────────────────────────────────
 
@@ -118,14 +124,35 @@ class TestStateHistoryEntry:
         )
         assert e.to_dict()["error_message"] == "oops"
 
+    def test_to_dict_metadata_defaults_to_empty(self):
+        e = StateHistoryEntry(DummyStates.A, StateResult.SUCCESS, duration=0.1)
+        assert e.metadata is None
+        assert e.to_dict()["metadata"] == {}
+
+    def test_is_immutable(self):
+        e = StateHistoryEntry(DummyStates.A, StateResult.SUCCESS, duration=0.1)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            e.result = StateResult.FAILURE
+
+    def test_slots_enforced(self):
+        e = StateHistoryEntry(DummyStates.A, StateResult.SUCCESS, duration=0.1)
+        assert not hasattr(e, "__dict__")
+
 
 # ── StateExecutionContext ──────────────────────────────────────────────────────
 
 class TestStateExecutionContext:
-    def test_elapsed_time_increases(self):
-        ctx = StateExecutionContext(current_state=DummyStates.A)
-        time.sleep(0.05)
-        assert ctx.elapsed_time >= 0.05
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Fake clock read by StateExecutionContext; advance via clock[0]."""
+        clock = [1000.0]
+        monkeypatch.setattr("statemachine.types.time", SimpleNamespace(time=lambda: clock[0]))
+        return clock
+
+    def test_elapsed_time_increases(self, clock):
+        ctx = StateExecutionContext(current_state=DummyStates.A, start_time=clock[0])
+        clock[0] += 0.05
+        assert ctx.elapsed_time == pytest.approx(0.05)
 
     def test_has_timed_out_false_when_none(self):
         ctx = StateExecutionContext(current_state=DummyStates.A)
@@ -135,9 +162,25 @@ class TestStateExecutionContext:
         ctx = StateExecutionContext(current_state=DummyStates.A)
         assert ctx.has_timed_out(9999.0) is False
 
-    def test_has_timed_out_true_after_threshold(self):
-        ctx = StateExecutionContext(
-            current_state=DummyStates.A,
-            start_time=time.time() - 10.0,  # pretend it started 10s ago
-        )
+    def test_has_timed_out_true_after_threshold(self, clock):
+        ctx = StateExecutionContext(current_state=DummyStates.A, start_time=clock[0])
+        clock[0] += 10.0
         assert ctx.has_timed_out(5.0) is True
+
+    def test_slots_enforced_but_mutable(self):
+        ctx = StateExecutionContext(current_state=DummyStates.A)
+        assert not hasattr(ctx, "__dict__")
+        ctx.retry_count = 2
+        assert ctx.retry_count == 2
+
+    def test_metadata_created_on_first_set(self):
+        ctx = StateExecutionContext(current_state=DummyStates.A)
+        assert ctx._metadata is None
+        ctx.set_metadata("attempt", 1)
+        ctx.set_metadata("source", "api")
+        assert ctx.metadata == {"attempt": 1, "source": "api"}
+
+    def test_metadata_item_assignment(self):
+        ctx = StateExecutionContext(current_state=DummyStates.A)
+        ctx.metadata["k"] = 1
+        assert ctx.metadata == {"k": 1}